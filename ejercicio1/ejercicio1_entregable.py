@@ -1,5 +1,14 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
+import sys
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # opcional: se usa json de la biblioteca estándar
 
 
 # ============================================================
@@ -7,15 +16,17 @@ import json
 # ============================================================
 
 class OrderInfo:
+    __slots__ = ("order_id", "total", "name", "email", "phone", "device")
+
     def __init__(self, order_data):
-        self.customer = order_data["customer"]
+        customer = order_data["customer"]
         self.order_id = order_data["order_id"]
         self.total = order_data["total"]
 
-        self.name = self.customer["name"]
-        self.email = self.customer["email"]
-        self.phone = self.customer["phone"]
-        self.device = self.customer["device_id"]
+        self.name = customer["name"]
+        self.email = customer["email"]
+        self.phone = customer["phone"]
+        self.device = customer["device_id"]
 
 
 # ============================================================
@@ -23,7 +34,7 @@ class OrderInfo:
 # ============================================================
 
 class NotificationStrategy:
-    def send(self, info: OrderInfo):
+    def send(self, info: OrderInfo, timestamp: str):
         raise NotImplementedError
 
 
@@ -32,55 +43,57 @@ class NotificationStrategy:
 # ============================================================
 
 class EmailNotification(NotificationStrategy):
-    def send(self, info: OrderInfo):
+    def send(self, info: OrderInfo, timestamp: str):
 
         message = (
             f"Estimado {info.name}, su pedido #{info.order_id} por ${info.total} ha sido confirmado."
         )
 
-        print(f"📧 EMAIL enviado a {info.email}")
-        print(f"   Asunto: Confirmación de Pedido #{info.order_id}")
-        print(f"   Mensaje: {message}\n")
+        sys.stdout.write(
+            f"📧 EMAIL enviado a {info.email}\n"
+            f"   Asunto: Confirmación de Pedido #{info.order_id}\n"
+            f"   Mensaje: {message}\n\n"
+        )
 
         return {
             'type': 'email',
             'to': info.email,
             'message': message,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': timestamp
         }
 
 
 class SMSNotification(NotificationStrategy):
-    def send(self, info: OrderInfo):
+    def send(self, info: OrderInfo, timestamp: str):
 
         message = (
             f"Pedido #{info.order_id} confirmado. Total: ${info.total}. Gracias por su compra!"
         )
 
-        print(f"📱 SMS enviado a {info.phone}")
-        print(f"   Mensaje: {message}\n")
+        sys.stdout.write(f"📱 SMS enviado a {info.phone}\n   Mensaje: {message}\n\n")
 
         return {
             'type': 'sms',
             'to': info.phone,
             'message': message,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': timestamp
         }
 
 
 class PushNotification(NotificationStrategy):
-    def send(self, info: OrderInfo):
+    def send(self, info: OrderInfo, timestamp: str):
 
         message = f"¡Pedido confirmado! #{info.order_id} - ${info.total}"
 
-        print(f"🔔 PUSH enviada al dispositivo {info.device}")
-        print(f"   Mensaje: {message}\n")
+        sys.stdout.write(
+            f"🔔 PUSH enviada al dispositivo {info.device}\n   Mensaje: {message}\n\n"
+        )
 
         return {
             'type': 'push',
             'to': info.device,
             'message': message,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': timestamp
         }
 
 
@@ -94,13 +107,24 @@ class NotificationFactory:
         "sms": SMSNotification,
         "push": PushNotification
     }
+    # Las estrategias no tienen estado: se comparte una instancia por tipo
+    _instances = {key: cls() for key, cls in _strategies.items()}
+    # Tabla de despacho con los métodos send ya enlazados
+    _senders = {key: strategy.send for key, strategy in _instances.items()}
 
     @staticmethod
     def create(notification_type):
-        cls = NotificationFactory._strategies.get(notification_type)
-        if not cls:
-            raise ValueError(f"Tipo de notificación desconocido: {notification_type}")
-        return cls()
+        try:
+            return NotificationFactory._instances[notification_type]
+        except KeyError:
+            raise ValueError(f"Tipo de notificación desconocido: {notification_type}") from None
+
+    @staticmethod
+    def sender(notification_type):
+        try:
+            return NotificationFactory._senders[notification_type]
+        except KeyError:
+            raise ValueError(f"Tipo de notificación desconocido: {notification_type}") from None
 
 
 # ============================================================
@@ -108,14 +132,18 @@ class NotificationFactory:
 # ============================================================
 
 class HistoryManager:
-    def __init__(self):
-        self.notifications = []
+    def __init__(self, max_records=10_000):
+        # Buffer circular: al llegar al límite se descartan los más antiguos
+        self.notifications = deque(maxlen=max_records)
+        self._lock = threading.Lock()
 
     def save(self, notification_record):
-        self.notifications.append(notification_record)
+        with self._lock:
+            self.notifications.append(notification_record)
 
     def get_all(self):
-        return self.notifications
+        with self._lock:
+            return list(self.notifications)
 
 
 # ============================================================
@@ -125,21 +153,55 @@ class HistoryManager:
 class OrderProcessor:
     def __init__(self):
         self.history = HistoryManager()
+        self._pool = ThreadPoolExecutor(max_workers=8)
+
+    def close(self):
+        # Espera los envíos pendientes y libera los hilos del pool
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def process_order(self, order_data, notification_types):
 
         info = OrderInfo(order_data)
+        # Se validan todos los tipos antes de despachar cualquier envío
+        senders = [NotificationFactory.sender(notif_type) for notif_type in notification_types]
+
+        timestamp = datetime.now().isoformat()
+
+        # Una sola escritura por bloque en lugar de un print por línea
+        sys.stdout.write(
+            f"\n{'='*50}\n"
+            f"Procesando pedido #{info.order_id}\n"
+            f"Cliente: {info.name}\n"
+            f"Total: ${info.total}\n"
+            f"{'='*50}\n\n"
+        )
 
-        print(f"\n{'='*50}")
-        print(f"Procesando pedido #{info.order_id}")
-        print(f"Cliente: {info.name}")
-        print(f"Total: ${info.total}")
-        print(f"{'='*50}\n")
-
-        for notif_type in notification_types:
-            strategy = NotificationFactory.create(notif_type)
-            record = strategy.send(info)
+        # Los envíos son I/O: se despachan en paralelo y el historial
+        # se guarda en el mismo orden en que se solicitaron (la salida en
+        # consola de cada envío puede aparecer en otro orden).
+        futures = [self._pool.submit(sender, info, timestamp) for sender in senders]
+        self._drain(futures)
+
+    def _drain(self, futures):
+        # Guarda cada envío terminado aunque otro haya fallado y
+        # al final propaga el primer error
+        error = None
+        for future in futures:
+            try:
+                record = future.result()
+            except Exception as exc:
+                if error is None:
+                    error = exc
+                continue
             self.history.save(record)
+        if error is not None:
+            raise error
 
     def get_history(self):
         return self.history.get_all()
@@ -184,4 +246,11 @@ if __name__ == "__main__":
     print("\n" + "="*50)
     print("HISTORIAL DE NOTIFICACIONES")
     print("="*50)
-    print(json.dumps(system.get_history(), indent=2, ensure_ascii=False))
+    history = system.get_history()
+    if orjson is not None:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(orjson.dumps(history, option=orjson.OPT_INDENT_2) + b"\n")
+    else:
+        print(json.dumps(history, indent=2, ensure_ascii=False))
+
+    system.close()
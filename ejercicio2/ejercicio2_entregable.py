@@ -1,31 +1,48 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from decimal import Decimal
 import json
+import math
+import numbers
+import sys
+import time
+from operator import itemgetter
+from typing import List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # opcional: se usa json de la biblioteca estándar
 
 
 # ============================================================
 # Builder simple para evitar concatenaciones manuales
 # ============================================================
 
+RULE = "=" * 60
+SEPARATOR = "-" * 60
+
+
 class ReportBuilder:
     def __init__(self):
+        # Cada parte es una línea; el formato las une una sola vez
         self.parts = []
 
     def add(self, text: str):
-        self.parts.append(text + "\n")
+        self.parts.append(text)
         return self
 
     def separator(self):
-        self.parts.append("-" * 60 + "\n")
+        self.parts.append(SEPARATOR)
         return self
 
     def header(self, title: str):
-        self.parts.append("=" * 60 + "\n")
-        self.parts.append(f"           {title}\n")
-        self.parts.append("=" * 60 + "\n")
+        self.parts.extend((RULE, f"           {title}", RULE))
         return self
 
-    def build(self):
-        return "".join(self.parts)
+    def build(self) -> str:
+        return "\n".join(self.parts) + "\n"
 
 
 # ============================================================
@@ -39,12 +56,13 @@ class ReportStrategy:
     - header() y body() son sobreescritos por subclases
     """
 
-    def generate(self, data, timestamp: str) -> str:
+    def generate(self, data, timestamp: str) -> List[str]:
         builder = ReportBuilder()
         builder.header(self.title())
         builder.add(f"Fecha de generación: {timestamp}\n")
         self.body(builder, data)
-        return builder.build()
+        # Las líneas se entregan sin unir; el formato las une una sola vez
+        return builder.parts
 
     def title(self):
         raise NotImplementedError
@@ -58,11 +76,18 @@ class ReportStrategy:
 # ============================================================
 
 class SalesReport(ReportStrategy):
+    _fields = itemgetter('product', 'amount')
+
     def title(self):
         return "REPORTE DE VENTAS"
 
     def body(self, builder, data):
-        total_sales = sum(item['amount'] for item in data['sales'])
+        # Una sola pasada: acumula el total y prepara el detalle
+        total_sales = 0
+        lines = []
+        for product, amount in map(self._fields, data['sales']):
+            total_sales += amount
+            lines.append(f"  • Producto: {product} - ${amount:.2f}")
 
         builder.add(f"Total de ventas: ${total_sales:.2f}")
         builder.add(f"Número de transacciones: {len(data['sales'])}")
@@ -71,37 +96,52 @@ class SalesReport(ReportStrategy):
         builder.add("Detalle de ventas:")
         builder.separator()
 
-        for sale in data['sales']:
-            builder.add(f"  • Producto: {sale['product']} - ${sale['amount']:.2f}")
+        for line in lines:
+            builder.add(line)
 
 
 class InventoryReport(ReportStrategy):
+    _fields = itemgetter('name', 'category', 'quantity')
+
     def title(self):
         return "REPORTE DE INVENTARIO"
 
     def body(self, builder, data):
-        total_items = sum(item['quantity'] for item in data['items'])
-        categories = len(set(item['category'] for item in data['items']))
+        # Una sola pasada: total, categorías y detalle
+        total_items = 0
+        categories = set()
+        lines = []
+        for name, category, quantity in map(self._fields, data['items']):
+            total_items += quantity
+            categories.add(category)
+            lines.append(f"  • {name} ({category}): {quantity} unidades")
 
         builder.add(f"Total de productos: {total_items}")
-        builder.add(f"Categorías: {categories}\n")
+        builder.add(f"Categorías: {len(categories)}\n")
 
         builder.add("Inventario actual:")
         builder.separator()
 
-        for item in data['items']:
-            builder.add(
-                f"  • {item['name']} ({item['category']}): {item['quantity']} unidades"
-            )
+        for line in lines:
+            builder.add(line)
 
 
 class FinancialReport(ReportStrategy):
     def title(self):
         return "REPORTE FINANCIERO"
 
+    @staticmethod
+    def _amount(value) -> float:
+        # Acepta un monto ya agregado (int, float, Decimal, escalares de
+        # NumPy...) o la colección de transacciones. Todo se normaliza a
+        # float para poder combinar, por ejemplo, un Decimal con una lista.
+        if isinstance(value, numbers.Number):
+            return float(value)
+        return math.fsum(value)
+
     def body(self, builder, data):
-        income = data['income']
-        expenses = data['expenses']
+        income = self._amount(data['income'])
+        expenses = self._amount(data['expenses'])
         balance = income - expenses
 
         builder.add(f"Ingresos: ${income:.2f}")
@@ -114,27 +154,49 @@ class FinancialReport(ReportStrategy):
 # ============================================================
 
 class FormatStrategy:
+    """
+    - format() envuelve el contenido ya construido (ReportBuilder.build())
+    - format_parts() recibe las líneas del builder; por defecto las une y
+      delega en format(), y las subclases pueden sobreescribirlo para
+      unir apertura, líneas y cierre en una sola operación
+    """
+
     def format(self, content: str) -> str:
         raise NotImplementedError
 
+    def format_parts(self, lines: List[str]) -> str:
+        return self.format("\n".join(lines) + "\n")
+
 
 class PDFFormatter(FormatStrategy):
     def format(self, content: str) -> str:
         print("📄 Generando reporte en formato PDF...")
         return f"[PDF FORMAT]\n{content}\n[END PDF]"
 
+    def format_parts(self, lines: List[str]) -> str:
+        print("📄 Generando reporte en formato PDF...")
+        return "\n".join(["[PDF FORMAT]", *lines, "", "[END PDF]"])
+
 
 class ExcelFormatter(FormatStrategy):
     def format(self, content: str) -> str:
         print("📊 Generando reporte en formato Excel...")
         return f"[EXCEL FORMAT]\n{content}\n[END EXCEL]"
 
+    def format_parts(self, lines: List[str]) -> str:
+        print("📊 Generando reporte en formato Excel...")
+        return "\n".join(["[EXCEL FORMAT]", *lines, "", "[END EXCEL]"])
+
 
 class HTMLFormatter(FormatStrategy):
     def format(self, content: str) -> str:
         print("🌐 Generando reporte en formato HTML...")
         return f"<html><body><pre>\n{content}\n</pre></body></html>"
 
+    def format_parts(self, lines: List[str]) -> str:
+        print("🌐 Generando reporte en formato HTML...")
+        return "\n".join(["<html><body><pre>", *lines, "", "</pre></body></html>"])
+
 
 # ============================================================
 # Estrategias de entrega (Strategy)
@@ -152,11 +214,19 @@ class EmailDelivery(DeliveryStrategy):
 
 
 class DownloadDelivery(DeliveryStrategy):
+    # (segundo, texto): strftime solo se recalcula cuando cambia el segundo
+    _stamp = (0, "")
+
+    @classmethod
+    def _file_timestamp(cls) -> str:
+        now = int(time.time())
+        stamp = cls._stamp
+        if stamp[0] != now:
+            stamp = cls._stamp = (now, datetime.fromtimestamp(now).strftime('%Y%m%d_%H%M%S'))
+        return stamp[1]
+
     def deliver(self, formatted_report: str, report_type: str, output_format: str):
-        filename = (
-            f"report_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            f".{output_format}"
-        )
+        filename = f"report_{report_type}_{self._file_timestamp()}.{output_format}"
         print("💾 Reporte disponible para descarga:")
         print(f"   Archivo: {filename}")
 
@@ -177,13 +247,15 @@ class ReportFactory:
         'inventory': InventoryReport,
         'financial': FinancialReport
     }
+    # Las estrategias no tienen estado: se comparte una instancia por tipo
+    _instances = {key: cls() for key, cls in _strategies.items()}
 
     @staticmethod
     def create(report_type: str) -> ReportStrategy:
-        cls = ReportFactory._strategies.get(report_type)
-        if not cls:
-            raise ValueError(f"Tipo de reporte desconocido: {report_type}")
-        return cls()
+        try:
+            return ReportFactory._instances[report_type]
+        except KeyError:
+            raise ValueError(f"Tipo de reporte desconocido: {report_type}") from None
 
 
 class FormatFactory:
@@ -192,13 +264,14 @@ class FormatFactory:
         'excel': ExcelFormatter,
         'html': HTMLFormatter
     }
+    _instances = {key: cls() for key, cls in _strategies.items()}
 
     @staticmethod
     def create(output_format: str) -> FormatStrategy:
-        cls = FormatFactory._strategies.get(output_format)
-        if not cls:
-            raise ValueError(f"Formato desconocido: {output_format}")
-        return cls()
+        try:
+            return FormatFactory._instances[output_format]
+        except KeyError:
+            raise ValueError(f"Formato desconocido: {output_format}") from None
 
 
 class DeliveryFactory:
@@ -207,13 +280,14 @@ class DeliveryFactory:
         'download': DownloadDelivery,
         'cloud': CloudDelivery
     }
+    _instances = {key: cls() for key, cls in _strategies.items()}
 
     @staticmethod
     def create(delivery_method: str) -> DeliveryStrategy:
-        cls = DeliveryFactory._strategies.get(delivery_method)
-        if not cls:
-            raise ValueError(f"Método de entrega desconocido: {delivery_method}")
-        return cls()
+        try:
+            return DeliveryFactory._instances[delivery_method]
+        except KeyError:
+            raise ValueError(f"Método de entrega desconocido: {delivery_method}") from None
 
 
 # ============================================================
@@ -221,14 +295,15 @@ class DeliveryFactory:
 # ============================================================
 
 class HistoryManager:
-    def __init__(self):
-        self._reports = []
+    def __init__(self, max_records: int = 10_000):
+        # Buffer circular: al llegar al límite se descartan los más antiguos
+        self._reports = deque(maxlen=max_records)
 
     def save(self, record: dict):
         self._reports.append(record)
 
     def get_all(self):
-        return self._reports
+        return list(self._reports)
 
 
 # ============================================================
@@ -236,20 +311,100 @@ class HistoryManager:
 # ============================================================
 
 class ReportSystem:
-    def __init__(self):
+    def __init__(self, verbose: bool = True):
         self.history = HistoryManager()
+        # Con verbose=False no se vuelve a imprimir el reporte completo
+        self.verbose = verbose
+        self._pool = ThreadPoolExecutor(max_workers=8)
 
-    def generate_report(self, report_type, data, output_format, delivery_method):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    def close(self):
+        # Espera las entregas pendientes y libera los hilos del pool
+        self._pool.shutdown()
 
-        report_strategy = ReportFactory.create(report_type)
-        format_strategy = FormatFactory.create(output_format)
-        delivery_strategy = DeliveryFactory.create(delivery_method)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
-        report_content = report_strategy.generate(data, timestamp)
-        formatted_report = format_strategy.format(report_content)
+    def generate_report(self, report_type, data, output_format, delivery_method):
+        report_strategy, format_strategy, delivery_strategy = self._resolve(
+            report_type, output_format, delivery_method
+        )
+        timestamp, formatted_report = self._render(report_strategy, format_strategy, data)
         delivery_strategy.deliver(formatted_report, report_type, output_format)
+        return self._finish(
+            report_type, output_format, delivery_method, timestamp, formatted_report
+        )
+
+    def generate_reports(self, requests):
+        """
+        Genera varios reportes. Cada entrega (I/O) se despacha en paralelo
+        mientras se generan los reportes siguientes, por lo que los mensajes
+        de las entregas pueden aparecer en cualquier orden en la consola.
+        El historial y el reporte impreso de cada entrega terminada se
+        registran en el orden de las solicitudes, aunque otra falle.
+        """
+        # Se validan todas las solicitudes antes de despachar cualquier entrega
+        jobs = [
+            (report_type, data, output_format, delivery_method,
+             *self._resolve(report_type, output_format, delivery_method))
+            for report_type, data, output_format, delivery_method in requests
+        ]
+
+        pending = []
+        try:
+            for (report_type, data, output_format, delivery_method,
+                 report_strategy, format_strategy, delivery_strategy) in jobs:
+                timestamp, formatted_report = self._render(
+                    report_strategy, format_strategy, data
+                )
+                future = self._pool.submit(
+                    delivery_strategy.deliver, formatted_report, report_type, output_format
+                )
+                pending.append((future, report_type, output_format, delivery_method,
+                                timestamp, formatted_report))
+        except BaseException:
+            # Se registran las entregas ya despachadas, pero el error que
+            # se propaga es el original y no uno de las entregas
+            try:
+                self._drain(pending)
+            except Exception:
+                pass
+            raise
+        return self._drain(pending)
+
+    def _resolve(self, report_type, output_format, delivery_method):
+        return (
+            ReportFactory.create(report_type),
+            FormatFactory.create(output_format),
+            DeliveryFactory.create(delivery_method),
+        )
 
+    def _render(self, report_strategy, format_strategy, data):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        report_lines = report_strategy.generate(data, timestamp)
+        return timestamp, format_strategy.format_parts(report_lines)
+
+    def _drain(self, pending):
+        # Registra cada entrega terminada aunque otra haya fallado y
+        # al final propaga el primer error
+        results = []
+        error = None
+        for future, *record in pending:
+            try:
+                future.result()
+            except Exception as exc:
+                if error is None:
+                    error = exc
+                continue
+            results.append(self._finish(*record))
+        if error is not None:
+            raise error
+        return results
+
+    def _finish(self, report_type, output_format, delivery_method, timestamp,
+                formatted_report):
         self.history.save({
             'type': report_type,
             'format': output_format,
@@ -257,9 +412,10 @@ class ReportSystem:
             'timestamp': timestamp
         })
 
-        print("\n✅ Reporte generado exitosamente\n")
-        print(formatted_report)
-        print("\n" + "=" * 60 + "\n")
+        if self.verbose:
+            print("\n✅ Reporte generado exitosamente\n")
+            print(formatted_report)
+            print(f"\n{RULE}\n")
 
         return formatted_report
 
@@ -307,6 +463,21 @@ if __name__ == "__main__":
 
     system.generate_report('financial', financial_data, 'html', 'cloud')
 
+    # Reporte financiero a partir de transacciones (monto Decimal + lista)
+    transactions_data = {
+        'income': Decimal('50000.00'),
+        'expenses': [12000.00, 15000.00, 5000.00]
+    }
+
+    system.generate_report('financial', transactions_data, 'pdf', 'download')
+
     # Mostrar historial
     print("\nHISTORIAL DE REPORTES GENERADOS:")
-    print(json.dumps(system.get_report_history(), indent=2, ensure_ascii=False))
+    history = system.get_report_history()
+    if orjson is not None:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(orjson.dumps(history, option=orjson.OPT_INDENT_2) + b"\n")
+    else:
+        print(json.dumps(history, indent=2, ensure_ascii=False))
+
+    system.close()